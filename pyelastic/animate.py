@@ -1,5 +1,6 @@
 import os
 import glob
+import atexit
 import datetime
 import numpy as np
 import matplotlib.pyplot as plt
@@ -7,12 +8,51 @@ from matplotlib import animation
 from scipy.integrate import solve_ivp
 from multiprocessing import cpu_count, Pool
 from .double_pendulum import ElasticPendulum
+from ._rk import HAS_NUMBA
 
 VID_DIR = "assets"
 plt.rc("text", usetex=False)
 plt.style.use("dark_background")
 
 
+_POOL = None
+
+
+def _get_pool(cores):
+    """Return the shared worker pool, creating it on first use
+
+    Spawning a Pool costs a fork per worker, which compounds when several
+    animations are rendered in one process, so the pool is created once
+    and reused. It is torn down at interpreter exit.
+
+    Args:
+        cores : int, number of worker processes for the initial pool
+
+    Returns:
+        multiprocessing.pool.Pool
+    """
+    global _POOL
+    if _POOL is None:
+        _POOL = Pool(processes=cores)
+        atexit.register(_POOL.terminate)
+    return _POOL
+
+
+def _integrate_pendulum(pendulum):
+    """Integrate a pendulum in a worker process
+
+    Module-level so it can be pickled by multiprocessing.Pool.
+
+    Args:
+        pendulum : ElasticPendulum, constructed but not yet integrated
+
+    Returns:
+        ElasticPendulum, the same pendulum with its trajectory filled in
+    """
+    pendulum.integrate()
+    return pendulum
+
+
 class Animation:
     """Animate
 
@@ -39,6 +79,9 @@ class Animation:
         self.fps = fps
         self.ns = 50
         self.s = 4
+        # Start index of each trace window relative to the current frame;
+        # fixed once ns and s are set
+        self._j_offsets = [(self.ns - j) * self.s for j in range(self.ns)]
         self.tend = tend
         self.npends = npends
 
@@ -61,6 +104,34 @@ class Animation:
         else:
             self.cores = cpu_count()
 
+    def _movie_writer(self, format):
+        """Build a writer that streams frames straight to ffmpeg
+
+        Falls back to Pillow for gifs when no ffmpeg binary is on the
+        path; mp4 output has no such fallback, so that raises instead of
+        letting ffmpeg fail mid-save.
+
+        Args:
+            format : str, "gif" or "mp4"
+
+        Returns:
+            matplotlib.animation.AbstractMovieWriter
+
+        Raises:
+            RuntimeError, if mp4 output is requested without ffmpeg
+        """
+        if not animation.FFMpegWriter.isAvailable():
+            if format == "mp4":
+                raise RuntimeError(
+                    "mp4 output requires an ffmpeg binary on the path"
+                )
+            return animation.PillowWriter(fps=self.fps)
+        if format == "mp4":
+            return animation.FFMpegWriter(
+                fps=self.fps, extra_args=["-vcodec", "libx264"]
+            )
+        return animation.FFMpegWriter(fps=self.fps)
+
     def single_init(self):
         """ """
         self.line1.set_data([], [])
@@ -71,35 +142,48 @@ class Animation:
         for j in range(self.ns):
             self.trace_lc1[j].set_data([], [])
             self.trace_lc2[j].set_data([], [])
-        return self.line1, self.dot1, self.line2, self.dot2, self.dot3
+        return (
+            self.line1,
+            self.dot1,
+            self.line2,
+            self.dot2,
+            self.dot3,
+            *self.trace_lc1,
+            *self.trace_lc2,
+        )
 
     def single_animate(self, i):
         """ """
         self.line1.set_data([0, self.pendulum.x1[i]], [0, self.pendulum.y1[i]])
-        self.dot1.set_data(self.pendulum.x1[i], self.pendulum.y1[i])
+        self.dot1.set_data([self.pendulum.x1[i]], [self.pendulum.y1[i]])
         self.line2.set_data(
             [self.pendulum.x1[i], self.pendulum.x2[i]],
             [self.pendulum.y1[i], self.pendulum.y2[i]],
         )
-        self.dot2.set_data(self.pendulum.x2[i], self.pendulum.y2[i])
-        self.dot3.set_data(0, 0)
+        self.dot2.set_data([self.pendulum.x2[i]], [self.pendulum.y2[i]])
+        self.dot3.set_data([0], [0])
 
-        for j in range(self.ns):
-            imin = i - (self.ns - j) * self.s
-            if imin < 0:
-                continue
+        # imin >= 0 exactly when j >= ns - i // s, so skip the empty
+        # windows instead of testing every trace
+        for j in range(max(0, self.ns - i // self.s), self.ns):
+            imin = i - self._j_offsets[j]
             imax = imin + self.s + 1
-            alpha = (j / self.ns) ** 2
             self.trace_lc1[j].set_data(
                 self.pendulum.x1[imin:imax], self.pendulum.y1[imin:imax]
             )
-            self.trace_lc1[j].set_alpha(alpha)
             self.trace_lc2[j].set_data(
                 self.pendulum.x2[imin:imax], self.pendulum.y2[imin:imax]
             )
-            self.trace_lc2[j].set_alpha(alpha)
 
-        return self.line1, self.dot1, self.line2, self.dot2, self.dot3
+        return (
+            self.line1,
+            self.dot1,
+            self.line2,
+            self.dot2,
+            self.dot3,
+            *self.trace_lc1,
+            *self.trace_lc2,
+        )
 
     def main_animate(self, size=800, dpi=100, format="gif"):
         """ """
@@ -108,17 +192,16 @@ class Animation:
         _ = self.pendulum.integrate()
 
         self.fig = plt.figure(figsize=(size / dpi, size / dpi), dpi=dpi)
-        m1 = np.max([self.pendulum.x1, self.pendulum.x2])
-        m2 = np.max([self.pendulum.y1, self.pendulum.y2])
-        if m1 < 0:
-            m1 = 2
-        if m2 < 0:
-            m2 = 2
-
-        ax = plt.axes(
-            xlim=[np.min([self.pendulum.x1, self.pendulum.x2]), m1],
-            ylim=[np.min([self.pendulum.y1, self.pendulum.y2]), m2],
-        )
+        mini_x = min(self.pendulum.x1.min(), self.pendulum.x2.min())
+        maxi_x = max(self.pendulum.x1.max(), self.pendulum.x2.max())
+        mini_y = min(self.pendulum.y1.min(), self.pendulum.y2.min())
+        maxi_y = max(self.pendulum.y1.max(), self.pendulum.y2.max())
+        if maxi_x < 0:
+            maxi_x = 2
+        if maxi_y < 0:
+            maxi_y = 2
+
+        ax = plt.axes(xlim=[mini_x, maxi_x], ylim=[mini_y, maxi_y])
         ax.axis("off")
         (self.line1,) = ax.plot([], [], lw=2, color="cyan", zorder=0)
         (self.dot1,) = ax.plot([], [], color="cyan", marker="o", zorder=2)
@@ -127,14 +210,17 @@ class Animation:
         (self.dot3,) = ax.plot([], [], color="cyan", marker="o", zorder=2)
         self.trace_lc1 = []
         self.trace_lc2 = []
-        for _ in range(self.ns):
+        for j in range(self.ns):
+            # Trace transparency only depends on the segment index, so set
+            # it once here instead of per frame in single_animate
+            alpha = (j / self.ns) ** 2
             (trace1,) = ax.plot(
                 [],
                 [],
                 c="cyan",
                 solid_capstyle="round",
                 lw=1.5,
-                alpha=0,
+                alpha=alpha,
                 zorder=0,
             )
             (trace2,) = ax.plot(
@@ -143,13 +229,12 @@ class Animation:
                 c="magenta",
                 solid_capstyle="round",
                 lw=1.5,
-                alpha=0,
+                alpha=alpha,
                 zorder=0,
             )
             self.trace_lc1.append(trace1)
             self.trace_lc2.append(trace2)
 
-        self.fig.set_size_inches(size / dpi, size / dpi, forward=True)
         self.fig.tight_layout()
 
         anim = animation.FuncAnimation(
@@ -157,24 +242,22 @@ class Animation:
             self.single_animate,
             init_func=self.single_init,
             frames=self.pendulum.x1.shape[0],
-            interval=0,
+            interval=1000 / self.fps,
             blit=True,
             cache_frame_data=False,
         )
 
-        if format == "gif":
-            anim.save(os.path.join(VID_DIR, "sim.gif"), fps=self.fps)
-
-        else:
-            anim.save(
-                os.path.join(VID_DIR, "sim.mp4"),
-                fps=self.fps,
-                extra_args=["-vcodec", "libx264"],
-            )
+        anim.save(
+            os.path.join(VID_DIR, "sim." + format),
+            writer=self._movie_writer(format),
+        )
+        # Release the pyplot-managed figure; repeated saves otherwise
+        # accumulate figures for the lifetime of the process
+        plt.close(self.fig)
 
     def n_init(self):
         """ """
-        self.anchor.set_data(0, 0)
+        self.anchor.set_data([0], [0])
 
         for pi in range(self.npends):
             self.linetop[pi].set_data([], [])
@@ -184,57 +267,79 @@ class Animation:
             for j in range(self.ns):
                 self.traces[pi][j].set_data([], [])
 
-        return (self.linetop[0],)
+        return self._n_artists()
+
+    def _n_artists(self):
+        """Collect every artist touched by n_animate for blitting"""
+        artists = [self.anchor]
+        for pi in range(self.npends):
+            artists += [
+                self.linetop[pi],
+                self.dotmid[pi],
+                self.lines[pi],
+                self.dots[pi],
+            ]
+            artists += self.traces[pi]
+        return tuple(artists)
 
     def n_animate(self, i):
         """ """
+        j0 = max(0, self.ns - i // self.s)
         for pi in range(self.npends):
             self.linetop[pi].set_data(
                 [0, self.pendulums[pi].x1[i]], [0, self.pendulums[pi].y1[i]]
             )
-            self.dotmid[pi].set_data(self.pendulums[pi].x1[i], self.pendulums[pi].y1[i])
-            self.dots[pi].set_data(self.pendulums[pi].x2[i], self.pendulums[pi].y2[i])
+            self.dotmid[pi].set_data(
+                [self.pendulums[pi].x1[i]], [self.pendulums[pi].y1[i]]
+            )
+            self.dots[pi].set_data(
+                [self.pendulums[pi].x2[i]], [self.pendulums[pi].y2[i]]
+            )
             self.lines[pi].set_data(
                 [self.pendulums[pi].x1[i], self.pendulums[pi].x2[i]],
                 [self.pendulums[pi].y1[i], self.pendulums[pi].y2[i]],
             )
-            for j in range(self.ns):
-                imin = i - (self.ns - j) * self.s
-                if imin < 0:
-                    continue
+            for j in range(j0, self.ns):
+                imin = i - self._j_offsets[j]
                 imax = imin + self.s + 1
-                alpha = (j / self.ns) ** 2
                 self.traces[pi][j].set_data(
                     self.pendulums[pi].x2[imin:imax], self.pendulums[pi].y2[imin:imax]
                 )
-                self.traces[pi][j].set_alpha(alpha)
 
-        return (self.linetop[0],)
+        return self._n_artists()
 
     def main_n_animate(self, size=800, dpi=100, format="gif", cmap=plt.cm.inferno):
         """ """
         assert format in ["gif", "mp4"], "Not a supported format"
-        self.pendulums = []
-
-        for b in self.beta:
-            ds = ElasticPendulum(
+        # Construct in the parent so the random spring constants still come
+        # from the seeded global RNG, then integrate across workers
+        self.pendulums = [
+            ElasticPendulum(
                 fps=self.fps, t_end=self.tend, alpha_0=self.alpha, beta_0=b
             )
-            _ = ds.integrate()
-            self.pendulums.append(ds)
+            for b in self.beta
+        ]
+        if HAS_NUMBA:
+            # The compiled batch kernel parallelizes over threads, which
+            # is both cheaper than forking workers and safe to combine
+            # with numba's thread pool (fork after numba has started its
+            # threads deadlocks interpreter shutdown)
+            self.pendulums = ElasticPendulum._integrate_many(self.pendulums)
+        elif self.npends > 1:
+            pool = _get_pool(self.cores)
+            self.pendulums = pool.map(_integrate_pendulum, self.pendulums)
+        else:
+            for ds in self.pendulums:
+                ds.integrate()
 
         mini_x, maxi_x = 0, 1
         mini_y, maxi_y = 0, 1
 
         for d in self.pendulums:
-            if np.min([d.x1, d.x2]) < mini_x:
-                mini_x = np.min([d.x1, d.x2])
-            if np.max([d.x1, d.x2]) > maxi_x:
-                maxi_x = np.max([d.x1, d.x2])
-            if np.min([d.y1, d.y2]) < mini_y:
-                mini_y = np.min([d.y1, d.y2])
-            if np.max([d.y1, d.y2]) > maxi_y:
-                maxi_y = np.max([d.y1, d.y2])
+            mini_x = min(mini_x, d.x1.min(), d.x2.min())
+            maxi_x = max(maxi_x, d.x1.max(), d.x2.max())
+            mini_y = min(mini_y, d.y1.min(), d.y2.min())
+            maxi_y = max(maxi_y, d.y1.max(), d.y2.max())
 
         self.fig = plt.figure(figsize=(size / dpi, size / dpi), dpi=dpi)
         ax = plt.axes(xlim=[mini_x, maxi_x], ylim=[mini_y, maxi_y])
@@ -259,21 +364,20 @@ class Animation:
             self.lines.append(line)
             self.linetop.append(linetop)
             self.dotmid.append(dotmid)
-            for _ in range(self.ns):
+            for j in range(self.ns):
                 (trace,) = ax.plot(
                     [],
                     [],
                     c=colors[pi],
                     solid_capstyle="round",
                     lw=1.5,
-                    alpha=0,
+                    alpha=(j / self.ns) ** 2,
                     zorder=0,
                 )
                 traces.append(trace)
 
             self.traces.append(traces)
 
-        self.fig.set_size_inches(size / dpi, size / dpi, forward=True)
         self.fig.tight_layout()
 
         anim = animation.FuncAnimation(
@@ -281,17 +385,15 @@ class Animation:
             self.n_animate,
             init_func=self.n_init,
             frames=self.pendulums[0].x1.shape[0],
-            interval=0,
+            interval=1000 / self.fps,
             blit=True,
             cache_frame_data=False,
         )
 
-        if format == "gif":
-            anim.save(os.path.join(VID_DIR, "sim.gif"), fps=self.fps)
-
-        else:
-            anim.save(
-                os.path.join(VID_DIR, "sim.mp4"),
-                fps=self.fps,
-                extra_args=["-vcodec", "libx264"],
-            )
+        anim.save(
+            os.path.join(VID_DIR, "sim." + format),
+            writer=self._movie_writer(format),
+        )
+        # Release the pyplot-managed figure; repeated saves otherwise
+        # accumulate figures for the lifetime of the process
+        plt.close(self.fig)
@@ -2,11 +2,14 @@ import os
 import glob
 import datetime
 import numpy as np
+from math import sin, cos
 import matplotlib.pyplot as plt
+from functools import partial
 from scipy.integrate import solve_ivp
-from scipy.interpolate import interp1d
 from multiprocessing import cpu_count, Pool
 
+from ._rk import HAS_NUMBA, _rhs, _to_cart, batch_integrate, integrate_rk45
+
 VID_DIR = "assets"
 
 plt.rc("text", usetex=False)
@@ -63,142 +66,314 @@ class ElasticPendulum:
         self.dt = 1.0 / self.fps
 
         self.t_eval = np.arange(0, self.t_end, self.dt)
+        # Reused by _inte so each RHS call avoids a list allocation plus
+        # the list-to-array conversion inside solve_ivp
+        self._rhs_buf = np.empty(8)
         if cores is None:
             self.cores = cpu_count()
         else:
             self.cores = cores
 
-    def _alpha_pp(self, t, Y):
-        """Animate
+    def _inte(self, t, Y):
+        """Evaluate the full state derivative in pure Python
 
-        Args:
-            save_movie : boolean, default=True
-
-        Returns:
-            None
-        """
-        # Y[0] = alpha_1, Y[1] = alpha_0
-        alpha_0, alpha_1, beta_0, beta_1, a0, a1, b0, _ = Y
-        return -(
-            self.g * self.m1 * np.sin(alpha_0)
-            - self.k2 * self.l2 * np.sin(alpha_0 - beta_0)
-            + self.k2 * b0 * np.sin(alpha_0 - beta_0)
-            + 2 * self.m1 * a1 * alpha_1
-        ) / (self.m1 * a0)
-
-    def _beta_pp(self, t, Y):
-        """Animate
+        Shares the sin/cos of (alpha_0 - beta_0) and alpha_0 across all
+        four second derivatives rather than recomputing them per term.
 
         Args:
-            save_movie : boolean, default=True
+            t : float, integration time
+            Y : array-like, state vector
 
         Returns:
-            None
+            np.ndarray, time derivative of the state vector
         """
-        # Y[0] = beta_1, Y[1] = beta_0
         alpha_0, alpha_1, beta_0, beta_1, a0, a1, b0, b1 = Y
-        return (
-            -self.k1 * self.l1 * np.sin(alpha_0 - beta_0)
-            + self.k1 * a0 * np.sin(alpha_0 - beta_0)
-            - 2.0 * self.m1 * b1 * beta_1
-        ) / (self.m1 * b0)
-
-    def _a_pp(self, t, Y):
-        """Animate
+        sab = sin(alpha_0 - beta_0)
+        cab = cos(alpha_0 - beta_0)
+        sa = sin(alpha_0)
+        ca = cos(alpha_0)
+        g, m1, m2 = self.g, self.m1, self.m2
+        k1, k2, l1, l2 = self.k1, self.k2, self.l1, self.l2
+        buf = self._rhs_buf
+        buf[0] = alpha_1
+        buf[1] = -(
+            g * m1 * sa - k2 * l2 * sab + k2 * b0 * sab + 2 * m1 * a1 * alpha_1
+        ) / (m1 * a0)
+        buf[2] = beta_1
+        buf[3] = (-k1 * l1 * sab + k1 * a0 * sab - 2.0 * m1 * b1 * beta_1) / (m1 * b0)
+        buf[4] = a1
+        buf[5] = (
+            k1 * l1 + g * m1 * ca - k2 * l2 * cab + k2 * b0 * cab
+            + a0 * (-k1 + m1 * alpha_1 ** 2)
+        ) / m1
+        buf[6] = b1
+        buf[7] = (
+            k2 * l2 * m1 + k2 * l2 * m2 * cab + k1 * m2 * a0 * cab
+            - b0 * (k2 * (m1 + m2) - m1 * m2 * beta_1 ** 2)
+        ) / (m1 * m2)
+        # scipy's RK solvers keep a reference to the previous RHS value
+        # across (possibly rejected) steps, so hand back a copy rather
+        # than the live buffer
+        return buf.copy()
+
+    def _jac(self, t, Y):
+        """Analytic Jacobian of the state derivative
+
+        Used by the implicit scipy solvers (LSODA/BDF/Radau) so they can
+        factor the system instead of estimating the Jacobian with extra
+        RHS evaluations.
 
         Args:
-            save_movie : boolean, default=True
+            t : float, integration time
+            Y : array-like, state vector
 
         Returns:
-            None
+            np.ndarray of shape (8, 8), d(dY/dt)/dY
         """
-        # Y[0] = a1, Y[1] = a0
         alpha_0, alpha_1, beta_0, beta_1, a0, a1, b0, b1 = Y
-        return (
-            self.k1 * self.l1
-            + self.g * self.m1 * np.cos(alpha_0)
-            - self.k2 * self.l2 * np.cos(alpha_0 - beta_0)
-            + self.k2 * b0 * np.cos(alpha_0 - beta_0)
-            + a0 * (-self.k1 + self.m1 * alpha_1 ** 2)
-        ) / self.m1
-
-    def _b_pp(self, t, Y):
+        sab = sin(alpha_0 - beta_0)
+        cab = cos(alpha_0 - beta_0)
+        sa = sin(alpha_0)
+        ca = cos(alpha_0)
+        g, m1, m2 = self.g, self.m1, self.m2
+        k1, k2, l1, l2 = self.k1, self.k2, self.l1, self.l2
+
+        J = np.zeros((8, 8))
+        J[0, 1] = 1.0
+        J[2, 3] = 1.0
+        J[4, 5] = 1.0
+        J[6, 7] = 1.0
+
+        n_alpha = g * m1 * sa - k2 * l2 * sab + k2 * b0 * sab + 2 * m1 * a1 * alpha_1
+        J[1, 0] = -(g * m1 * ca - k2 * (l2 - b0) * cab) / (m1 * a0)
+        J[1, 1] = -2.0 * a1 / a0
+        J[1, 2] = -k2 * (l2 - b0) * cab / (m1 * a0)
+        J[1, 4] = n_alpha / (m1 * a0 ** 2)
+        J[1, 5] = -2.0 * alpha_1 / a0
+        J[1, 6] = -k2 * sab / (m1 * a0)
+
+        n_beta = -k1 * l1 * sab + k1 * a0 * sab - 2.0 * m1 * b1 * beta_1
+        J[3, 0] = k1 * (a0 - l1) * cab / (m1 * b0)
+        J[3, 2] = -k1 * (a0 - l1) * cab / (m1 * b0)
+        J[3, 3] = -2.0 * b1 / b0
+        J[3, 4] = k1 * sab / (m1 * b0)
+        J[3, 6] = -n_beta / (m1 * b0 ** 2)
+        J[3, 7] = -2.0 * beta_1 / b0
+
+        J[5, 0] = -g * sa + k2 * (l2 - b0) * sab / m1
+        J[5, 1] = 2.0 * a0 * alpha_1
+        J[5, 2] = -k2 * (l2 - b0) * sab / m1
+        J[5, 4] = -k1 / m1 + alpha_1 ** 2
+        J[5, 6] = k2 * cab / m1
+
+        J[7, 0] = -(k2 * l2 + k1 * a0) * sab / m1
+        J[7, 2] = (k2 * l2 + k1 * a0) * sab / m1
+        J[7, 3] = 2.0 * b0 * beta_1
+        J[7, 4] = k1 * cab / m1
+        J[7, 6] = -(k2 * (m1 + m2) - m1 * m2 * beta_1 ** 2) / (m1 * m2)
+        return J
+
+    def integrate(self, method="rk45"):
         """Animate
 
         Args:
-            save_movie : boolean, default=True
+            method : str, default="rk45". "rk45" runs the compiled
+                adaptive Dormand-Prince loop; any other value is passed
+                through to scipy.integrate.solve_ivp (e.g. "LSODA").
 
         Returns:
             None
         """
-        # Y[0] = b1, Y[1] = b0
-        alpha_0, alpha_1, beta_0, beta_1, a0, a1, b0, b1 = Y
-        return (
-            self.k2 * self.l2 * self.m1
-            + self.k2 * self.l2 * self.m2 * np.cos(alpha_0 - beta_0)
-            + self.k1 * self.m2 * a0 * np.cos(alpha_0 - beta_0)
-            - b0 * (self.k2 * (self.m1 + self.m2) - self.m1 * self.m2 * beta_1 ** 2)
-        ) / (self.m1 * self.m2)
-
-    def _inte(self, t, Y):
-        """Animate
+        Y0 = np.array(
+            [
+                self.alpha_0,
+                self.alpha_1,
+                self.beta_0,
+                self.beta_1,
+                self.a0,
+                self.a1,
+                self.b0,
+                self.b1,
+            ]
+        )
+        # The implicit solvers factor the Jacobian; give them the analytic
+        # one so they skip the finite-difference RHS evaluations. Explicit
+        # solvers warn if the option is passed at all, so only set it when
+        # it applies.
+        jac_opts = {}
+        if method in ("LSODA", "BDF", "Radau"):
+            jac_opts["jac"] = (
+                (lambda t, y, *a: self._jac(t, y)) if HAS_NUMBA else self._jac
+            )
+        if method == "rk45":
+            self.y = integrate_rk45(
+                Y0,
+                self.t_eval,
+                self.g,
+                self.m1,
+                self.m2,
+                self.k1,
+                self.k2,
+                self.l1,
+                self.l2,
+            )
+        elif HAS_NUMBA:
+            self.solution = solve_ivp(
+                _rhs,
+                [0, self.t_end],
+                Y0,
+                t_eval=self.t_eval,
+                method=method,
+                args=(self.g, self.m1, self.m2, self.k1, self.k2, self.l1, self.l2),
+                **jac_opts,
+            )
+            self.y = self.solution.y.T
+        else:
+            self.solution = solve_ivp(
+                self._inte,
+                [0, self.t_end],
+                Y0,
+                t_eval=self.t_eval,
+                method=method,
+                **jac_opts,
+            )
+            self.y = self.solution.y.T
+        self.cartesian(self.y[:, [0, 2, 4, 6]])
+
+    @classmethod
+    def integrate_batch(cls, alphas, betas, t_end=2, fps=24):
+        """Integrate a batch of pendulums in one compiled parallel sweep
+
+        All pendulums share the time grid; spring constants are drawn per
+        pendulum exactly as in the scalar constructor. Much cheaper than
+        integrating M pendulums through M separate Python calls.
 
         Args:
-            save_movie : boolean, default=True
+            alphas : array-like, initial alpha_0 per pendulum
+            betas : array-like, initial beta_0 per pendulum
+            t_end : float, default=2, end time of the integration
+            fps : int, default=24, samples per second
 
         Returns:
-            None
+            list of ElasticPendulum, integrated pendulums with Cartesian
+            trajectories filled in
         """
-        return [
-            Y[1],
-            self._alpha_pp(t, Y),
-            Y[3],
-            self._beta_pp(t, Y),
-            Y[5],
-            self._a_pp(t, Y),
-            Y[7],
-            self._b_pp(t, Y),
+        pendulums = [
+            cls(alpha_0=a, beta_0=b, t_end=t_end, fps=fps)
+            for a, b in zip(alphas, betas)
         ]
+        return cls._integrate_many(pendulums)
 
-    def integrate(self, method="LSODA"):
-        """Animate
+    @staticmethod
+    def _integrate_many(pendulums):
+        """Run already-constructed pendulums through the batch kernel
+
+        All pendulums must share the same time grid (fps and t_end).
 
         Args:
-            save_movie : boolean, default=True
+            pendulums : list of ElasticPendulum, not yet integrated
 
         Returns:
-            None
+            list of ElasticPendulum, the same pendulums integrated
         """
-        Y0 = [
-            self.alpha_0,
-            self.alpha_1,
-            self.beta_0,
-            self.beta_1,
-            self.a0,
-            self.a1,
-            self.b0,
-            self.b1,
-        ]
-        self.solution = solve_ivp(
-            self._inte, [0, self.t_end], Y0, t_eval=self.t_eval, method=method
+        y0s = np.array(
+            [
+                [p.alpha_0, p.alpha_1, p.beta_0, p.beta_1, p.a0, p.a1, p.b0, p.b1]
+                for p in pendulums
+            ]
+        )
+        k1s = np.array([p.k1 for p in pendulums])
+        k2s = np.array([p.k2 for p in pendulums])
+        ref = pendulums[0]
+        ys = batch_integrate(
+            y0s, ref.t_eval, ref.g, ref.m1, ref.m2, k1s, k2s, ref.l1, ref.l2
         )
-        self.cartesian(self.solution.y[[0, 2, 4, 6]].T)
+        for p, y in zip(pendulums, ys):
+            p.y = y
+            p.cartesian(y[:, [0, 2, 4, 6]])
+        return pendulums
 
     def cartesian(self, array):
-        """Animate
+        """Convert the angle/length solution to Cartesian trajectories
+
+        The Cartesian arrays only feed plotting and animation, which are
+        display-bound, so they are stored as float32; the integrator state
+        in self.y stays float64.
 
         Args:
-            save_movie : boolean, default=True
+            array : np.ndarray of shape (T, 4), columns (alpha_0, beta_0,
+                a0, b0) along the trajectory
 
         Returns:
             None
         """
-        self.x1 = array[:, 2] * np.sin(array[:, 0])
-        self.x2 = self.x1 + array[:, 3] * np.sin(array[:, 1])
-        self.y1 = -array[:, 2] * np.cos(array[:, 0])
-        self.y2 = self.y1 - array[:, 3] * np.cos(array[:, 1])
-
-        self.fx1 = interp1d(np.arange(0, self.x1.shape[0]), self.x1)
-        self.fy1 = interp1d(np.arange(0, self.x1.shape[0]), self.y1)
-        self.fx2 = interp1d(np.arange(0, self.x1.shape[0]), self.x2)
-        self.fy2 = interp1d(np.arange(0, self.x1.shape[0]), self.y2)
+        if HAS_NUMBA:
+            n = array.shape[0]
+            self.x1 = np.empty(n, dtype=np.float32)
+            self.x2 = np.empty(n, dtype=np.float32)
+            self.y1 = np.empty(n, dtype=np.float32)
+            self.y2 = np.empty(n, dtype=np.float32)
+            _to_cart(
+                np.ascontiguousarray(array[:, 0]),
+                np.ascontiguousarray(array[:, 1]),
+                np.ascontiguousarray(array[:, 2]),
+                np.ascontiguousarray(array[:, 3]),
+                self.x1,
+                self.x2,
+                self.y1,
+                self.y2,
+            )
+        else:
+            self.x1 = (array[:, 2] * np.sin(array[:, 0])).astype(np.float32)
+            self.x2 = self.x1 + (array[:, 3] * np.sin(array[:, 1])).astype(
+                np.float32
+            )
+            self.y1 = (-array[:, 2] * np.cos(array[:, 0])).astype(np.float32)
+            self.y2 = self.y1 - (array[:, 3] * np.cos(array[:, 1])).astype(
+                np.float32
+            )
+
+        # The radial distances hypot(x1, y1) and hypot(x2 - x1, y2 - y1)
+        # are exactly the spring-length coordinates, so keep them alongside
+        # the Cartesian arrays instead of recomputing them per frame
+        self.r1 = array[:, 2].astype(np.float32)
+        self.r2 = array[:, 3].astype(np.float32)
+
+        # Interpolants are built lazily through the fx1/fy1/fx2/fy2
+        # properties; most callers only plot and never touch them
+        self._t_grid = np.arange(0, self.x1.shape[0])
+        self._interp_cache = {}
+
+    def _interpolant(self, key, values):
+        """Build and memoize a linear interpolant over the frame index
+
+        Backed by np.interp, whose C-level evaluation is far cheaper per
+        call than an interp1d object for the short queries the animation
+        code makes.
+
+        Args:
+            key : str, cache key for the interpolant
+            values : np.ndarray, trajectory samples to interpolate
+
+        Returns:
+            callable, interpolant over the index range [0, T)
+        """
+        if key not in self._interp_cache:
+            self._interp_cache[key] = partial(np.interp, xp=self._t_grid, fp=values)
+        return self._interp_cache[key]
+
+    @property
+    def fx1(self):
+        return self._interpolant("fx1", self.x1)
+
+    @property
+    def fy1(self):
+        return self._interpolant("fy1", self.y1)
+
+    @property
+    def fx2(self):
+        return self._interpolant("fx2", self.x2)
+
+    @property
+    def fy2(self):
+        return self._interpolant("fy2", self.y2)